@@ -1,54 +1,143 @@
+import numpy as np
 import pandas as pd
+from scipy import sparse
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
-from ipywidgets import interact, widgets, VBox, HBox, Output
-from IPython.display import display, clear_output
+import os
+import pickle
 import warnings
+from functools import lru_cache
 warnings.filterwarnings('ignore')
 
-st.set_page_config(page_title="Crunchy Dashboard", layout="wide")
+ARCHIVO_ANIME = "anime.csv"
+# Dataset limpio y vistas precalculadas; se regenera si cambia anime.csv
+ARCHIVO_CACHE = "anime_limpio.pkl"
+# Subir este número cuando cambie lo que guarda preparar_datos
+FORMATO_CACHE = 1
+
+# Separar géneros: matriz dispersa anime × género (1 si el anime tiene el género)
+def construir_matriz_generos(generos: pd.Series):
+    """Devuelve la matriz de pertenencia (géneros × animes, CSR) y los nombres de los géneros."""
+    listas = generos.str.split(', ')
+    # Solo se expande la serie de géneros, no el DataFrame completo
+    etiquetas = listas.explode()
+    filas = np.repeat(np.arange(len(listas)), listas.str.len())
+    codigos, nombres = pd.factorize(etiquetas)
+    matriz = sparse.csr_matrix(
+        (np.ones(len(codigos)), (codigos, filas)),
+        shape=(len(nombres), len(listas))
+    )
+    return matriz, pd.Index(nombres, name='genre_list')
+
+def preparar_datos(df):
+    """Limpia el dataset y precalcula las vistas que usan los KPIs."""
+    # Limpieza de datos
+    df["rating"] = df["rating"].fillna(0)
+    df["genre"] = df["genre"].fillna("unknown")
+    df["type"] = df["type"].fillna("unknown")
+
+    matriz_generos, nombres_generos = construir_matriz_generos(df['genre'])
+
+    # Orden descendente estable: los primeros N equivalen a df.nlargest(N, col)
+    orden_top = {
+        col: np.argsort(-df[col].to_numpy(dtype='float64'), kind='stable')
+        for col in ['rating', 'members']
+    }
+    return {
+        'df': df,
+        'posiciones_con_rating': np.flatnonzero(df['rating'].to_numpy() > 0),
+        'matriz_generos': matriz_generos,
+        'nombres_generos': nombres_generos,
+        'orden_top': orden_top,
+    }
+
 # Cargar datos
-def load_data():
-    return pd.read_csv("anime.csv")
- 
-df = load_data()
+def load_data(ruta=ARCHIVO_ANIME, ruta_cache=ARCHIVO_CACHE):
+    """
+    Devuelve el dataset limpio desde la caché en disco. Si anime.csv cambió
+    (fecha de modificación o tamaño) o la caché es de otro formato, se vuelve
+    a leer y limpiar.
+    """
+    stat = os.stat(ruta)
+    version = (stat.st_mtime_ns, stat.st_size)
+    try:
+        with open(ruta_cache, 'rb') as f:
+            cache = pickle.load(f)
+        if cache.get('formato') == FORMATO_CACHE and cache.get('version') == version:
+            return cache['datos']
+    except Exception:
+        # Caché ausente, corrupta o escrita con otras versiones de pandas/scipy
+        # (ModuleNotFoundError, TypeError, ValueError...): se reconstruye
+        pass
 
-# Limpieza de datos
-df["rating"] = df["rating"].fillna(0)
-df["genre"] = df["genre"].fillna("unknown")
-df["type"] = df["type"].fillna("unknown")
-df['genre_list'] = df['genre'].str.split(', ')
+    datos = preparar_datos(pd.read_csv(ruta))
+    # Escritura atómica para que otro proceso nunca lea una caché a medias
+    temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+    with open(temporal, 'wb') as f:
+        pickle.dump({'formato': FORMATO_CACHE, 'version': version, 'datos': datos}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporal, ruta_cache)
+    return datos
 
-# Separar géneros
-genres_expanded = df.explode('genre_list')
+datos = load_data()
+df = datos['df']
+df_con_rating = df.iloc[datos['posiciones_con_rating']]
+matriz_generos = datos['matriz_generos']
+nombres_generos = datos['nombres_generos']
+orden_top = datos['orden_top']
 
-print("=" * 80)
-print("DASHBOARD DE KPIs - ANIME DATASET")
-print("=" * 80)
+# --- Cálculo de KPIs (memoizado por parámetros) ---
+# Los resultados se reutilizan entre clics; los DataFrames devueltos no deben modificarse.
 
+@lru_cache(maxsize=None)
+def calcular_rating():
+    ratings = df_con_rating['rating']
+    return {
+        'promedio': ratings.mean(),
+        'mediano': ratings.median(),
+        'total_animes': len(df),
+        'animes_con_rating': len(df_con_rating),
+    }
 
-# KPI 1: Rating Promedio General
+@lru_cache(maxsize=None)
+def _estadisticas_generos():
+    # Sumas por género como productos matriz-vector sobre la matriz dispersa
+    animes_por_genero = np.asarray(matriz_generos.sum(axis=1)).ravel()
+    conteo = matriz_generos @ df['anime_id'].notna().to_numpy(dtype='float64')
+    miembros = matriz_generos @ df['members'].fillna(0).to_numpy(dtype='float64')
+    suma_rating = matriz_generos @ df['rating'].to_numpy(dtype='float64')
+    return pd.DataFrame({
+        'rating': suma_rating / animes_por_genero,
+        'members': miembros.astype('int64'),
+        'count': conteo.astype('int64')
+    }, index=nombres_generos).sort_index().sort_values('members', ascending=False, kind='stable')
 
-def kpi_rating_promedio():
-    rating_promedio = df[df['rating'] > 0]['rating'].mean()
-    rating_mediano = df[df['rating'] > 0]['rating'].median()
-    total_animes = len(df)
-    animes_con_rating = len(df[df['rating'] > 0])
-    
-    print("\n📊 KPI 1: ANÁLISIS DE RATING")
-    print("-" * 80)
-    print(f"Rating Promedio General: {rating_promedio:.2f} / 10")
-    print(f"Rating Mediano: {rating_mediano:.2f} / 10")
-    print(f"Total de Animes: {total_animes:,}")
-    print(f"Animes con Rating: {animes_con_rating:,}")
-    print(f"% Animes con Rating: {(animes_con_rating/total_animes)*100:.1f}%")
-    
-    # Visualización
+@lru_cache(maxsize=None)
+def calcular_generos_populares(top_n=10):
+    return _estadisticas_generos().head(top_n)
+
+@lru_cache(maxsize=None)
+def calcular_tipo_programa():
+    return df_con_rating.groupby('type').agg({
+        'rating': 'mean',
+        'members': 'sum',
+        'anime_id': 'count'
+    }).rename(columns={'anime_id': 'count'}).sort_values('count', ascending=False)
+
+@lru_cache(maxsize=None)
+def calcular_top_animes(criterio='rating', top_n=10):
+    columna = 'rating' if criterio == 'rating' else 'members'
+    return df.iloc[orden_top[columna][:top_n]][['name', 'rating', 'members', 'type']]
+
+# --- Gráficas de KPIs ---
+# Cada función construye y devuelve la figura sin mostrarla (útil en modo headless).
+
+def figura_rating():
+    rating_promedio = calcular_rating()['promedio']
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
     
     # Distribución de ratings
-    df[df['rating'] > 0]['rating'].hist(bins=30, edgecolor='black', ax=axes[0], color='skyblue')
+    df_con_rating['rating'].hist(bins=30, edgecolor='black', ax=axes[0], color='skyblue')
     axes[0].axvline(rating_promedio, color='red', linestyle='--', linewidth=2, label=f'Promedio: {rating_promedio:.2f}')
     axes[0].set_xlabel('Rating')
     axes[0].set_ylabel('Frecuencia')
@@ -57,33 +146,16 @@ def kpi_rating_promedio():
     axes[0].grid(axis='y', alpha=0.3)
     
     # Box plot
-    df[df['rating'] > 0].boxplot(column='rating', ax=axes[1])
+    df_con_rating.boxplot(column='rating', ax=axes[1])
     axes[1].set_ylabel('Rating')
     axes[1].set_title('Box Plot de Ratings')
     axes[1].grid(axis='y', alpha=0.3)
     
     plt.tight_layout()
-    plt.show()
+    return fig
 
-# KPI 2: Top Géneros por Popularidad
-
-def kpi_generos_populares(top_n=10):
-    genre_stats = genres_expanded.groupby('genre_list').agg({
-        'rating': 'mean',
-        'members': 'sum',
-        'anime_id': 'count'
-    }).rename(columns={'anime_id': 'count'}).sort_values('members', ascending=False)
-    
-    top_genres = genre_stats.head(top_n)
-    
-    print(f"\n🎭 KPI 2: TOP {top_n} GÉNEROS MÁS POPULARES")
-    print("-" * 80)
-    print(f"{'Género':<25} {'Total Miembros':>15} {'Rating Prom':>12} {'# Animes':>10}")
-    print("-" * 80)
-    for idx, (genre, row) in enumerate(top_genres.iterrows(), 1):
-        print(f"{idx}. {genre:<22} {int(row['members']):>15,} {row['rating']:>11.2f} {int(row['count']):>10}")
-    
-    # Visualización
+def figura_generos_populares(top_n=10):
+    top_genres = calcular_generos_populares(top_n)
     fig, axes = plt.subplots(1, 2, figsize=(15, 6))
     
     # Gráfico de barras - Miembros
@@ -99,24 +171,10 @@ def kpi_generos_populares(top_n=10):
     axes[1].grid(axis='x', alpha=0.3)
     
     plt.tight_layout()
-    plt.show()
+    return fig
 
-# KPI 3: Análisis por Tipo de Programa
-def kpi_tipo_programa():
-    type_stats = df[df['rating'] > 0].groupby('type').agg({
-        'rating': 'mean',
-        'members': 'sum',
-        'anime_id': 'count'
-    }).rename(columns={'anime_id': 'count'}).sort_values('count', ascending=False)
-    
-    print("\n📺 KPI 3: ANÁLISIS POR TIPO DE PROGRAMA")
-    print("-" * 80)
-    print(f"{'Tipo':<15} {'Cantidad':>10} {'Rating Prom':>12} {'Total Miembros':>15}")
-    print("-" * 80)
-    for tipo, row in type_stats.iterrows():
-        print(f"{tipo:<15} {int(row['count']):>10,} {row['rating']:>11.2f} {int(row['members']):>15,}")
-    
-    # Visualización
+def figura_tipo_programa():
+    type_stats = calcular_tipo_programa()
     fig, axes = plt.subplots(1, 2, figsize=(14, 6))
     
     # Cantidad por tipo
@@ -136,17 +194,65 @@ def kpi_tipo_programa():
     axes[1].grid(axis='y', alpha=0.3)
     
     plt.tight_layout()
+    return fig
+
+# KPI 1: Rating Promedio General
+
+def kpi_rating_promedio():
+    stats = calcular_rating()
+    rating_promedio = stats['promedio']
+    rating_mediano = stats['mediano']
+    total_animes = stats['total_animes']
+    animes_con_rating = stats['animes_con_rating']
+    
+    print("\n📊 KPI 1: ANÁLISIS DE RATING")
+    print("-" * 80)
+    print(f"Rating Promedio General: {rating_promedio:.2f} / 10")
+    print(f"Rating Mediano: {rating_mediano:.2f} / 10")
+    print(f"Total de Animes: {total_animes:,}")
+    print(f"Animes con Rating: {animes_con_rating:,}")
+    print(f"% Animes con Rating: {(animes_con_rating/total_animes)*100:.1f}%")
+    
+    # Visualización
+    figura_rating()
+    plt.show()
+
+# KPI 2: Top Géneros por Popularidad
+
+def kpi_generos_populares(top_n=10):
+    top_genres = calcular_generos_populares(top_n)
+    
+    print(f"\n🎭 KPI 2: TOP {top_n} GÉNEROS MÁS POPULARES")
+    print("-" * 80)
+    print(f"{'Género':<25} {'Total Miembros':>15} {'Rating Prom':>12} {'# Animes':>10}")
+    print("-" * 80)
+    for idx, (genre, row) in enumerate(top_genres.iterrows(), 1):
+        print(f"{idx}. {genre:<22} {int(row['members']):>15,} {row['rating']:>11.2f} {int(row['count']):>10}")
+    
+    # Visualización
+    figura_generos_populares(top_n)
+    plt.show()
+
+# KPI 3: Análisis por Tipo de Programa
+def kpi_tipo_programa():
+    type_stats = calcular_tipo_programa()
+    
+    print("\n📺 KPI 3: ANÁLISIS POR TIPO DE PROGRAMA")
+    print("-" * 80)
+    print(f"{'Tipo':<15} {'Cantidad':>10} {'Rating Prom':>12} {'Total Miembros':>15}")
+    print("-" * 80)
+    for tipo, row in type_stats.iterrows():
+        print(f"{tipo:<15} {int(row['count']):>10,} {row['rating']:>11.2f} {int(row['members']):>15,}")
+    
+    # Visualización
+    figura_tipo_programa()
     plt.show()
 
 
 # KPI 4: Top Animes
 def kpi_top_animes(criterio='rating', top_n=10):
-    if criterio == 'rating':
-        top_animes = df.nlargest(top_n, 'rating')[['name', 'rating', 'members', 'type']]
-        titulo = "RATING"
-    else:
-        top_animes = df.nlargest(top_n, 'members')[['name', 'rating', 'members', 'type']]
-        titulo = "POPULARIDAD (Miembros)"
+    top_animes = calcular_top_animes(criterio, top_n)
+    titulo = "RATING" if criterio == 'rating' else "POPULARIDAD (Miembros)"
     
     print(f"\n🏆 KPI 4: TOP {top_n} ANIMES POR {titulo}")
     print("-" * 80)
@@ -158,6 +264,10 @@ def kpi_top_animes(criterio='rating', top_n=10):
 
 
 def crear_dashboard():
+    # Solo el dashboard interactivo necesita ipywidgets/IPython
+    from ipywidgets import widgets, VBox, HBox, Output
+    from IPython.display import display, clear_output
+
     output = Output()
     
     # Botones para KPIs
@@ -232,11 +342,19 @@ def crear_dashboard():
         print("\n✨ Bienvenido al Dashboard de KPIs de Anime")
         print("\n📌 Resumen del Dataset:")
         print(f"   • Total de animes: {len(df):,}")
-        print(f"   • Rating promedio: {df[df['rating'] > 0]['rating'].mean():.2f}")
+        print(f"   • Rating promedio: {calcular_rating()['promedio']:.2f}")
         print(f"   • Tipos de programas: {df['type'].nunique()}")
         print(f"   • Total de miembros: {df['members'].sum():,}")
         print("\n👆 Haz clic en los botones de arriba para ver los KPIs detallados")
 
-# Ejecutar dashboard
-crear_dashboard()
+# Ejecutar dashboard (al importar el módulo, p. ej. desde reporte_crunchy.py,
+# solo se cargan los datos y las funciones de KPIs)
+if __name__ == "__main__":
+    st.set_page_config(page_title="Crunchy Dashboard", layout="wide")
+
+    print("=" * 80)
+    print("DASHBOARD DE KPIs - ANIME DATASET")
+    print("=" * 80)
+
+    crear_dashboard()
 
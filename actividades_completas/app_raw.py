@@ -4,12 +4,32 @@ import boto3
 import json
 from io import StringIO
 import time # Para el temporizador de actualización
-from datetime import datetime # Para convertir a datetime si es necesario
+import threading
+from datetime import datetime, timedelta # Para convertir a datetime si es necesario
 
 
 # --- Configuración S3 ---
-BUCKET_NAME = "xideralaws-curso-benjamin2"
-PREFIX = "raw/"
+from config_s3 import BUCKET_NAME, PREFIX
+
+# --- Configuración de Retención ---
+# Los eventos crudos solo se conservan durante una ventana corta; para rangos
+# más largos se usan los resúmenes por minuto y por hora de cada servidor.
+VENTANA_CRUDOS = timedelta(minutes=15)
+MAX_EVENTOS_CRUDOS = 50_000
+RETENCION_MINUTOS = timedelta(hours=24)
+RETENCION_HORAS = timedelta(days=7)
+# Límite de cubetas (minutos u horas distintos) que guarda cada resumen
+MAX_CUBETAS_MINUTO = 24 * 60
+MAX_CUBETAS_HORA = 7 * 24
+# Las claves S3 empiezan con la fecha de creación, así que se listan a partir de
+# la última clave ya asentada (StartAfter). Solo se recuerdan las claves que
+# llegaron dentro del margen, para aceptar subidas que terminan tarde, y como
+# máximo MAX_CLAVES_VISTAS.
+MARGEN_LLEGADA_S3 = timedelta(minutes=10)
+MAX_CLAVES_VISTAS = 100_000
+
+STATUS_COLUMNS = ['OK', 'WARN', 'ERROR']
+
 # Inicializar el cliente S3 una sola vez
 # st.cache_resource asegura que el cliente boto3 se inicialice una vez.
 @st.cache_resource
@@ -18,46 +38,300 @@ def get_s3_client():
 
 s3 = get_s3_client()
 
+# --- Almacén con Retención por Niveles ---
+
+class AlmacenRetencion:
+    """
+    Guarda los eventos en memoria con límites fijos:
+    - eventos crudos de la ventana más reciente (VENTANA_CRUDOS)
+    - conteos de 'status' por minuto y por 'server_id' (RETENCION_MINUTOS)
+    - conteos de 'status' por hora y por 'server_id' (RETENCION_HORAS)
+    - claves S3 recientes (margen_llegada; como máximo max_claves más las de
+      una actualización)
+    Las ventanas se miden respecto al evento más reciente recibido. Los rangos
+    servidos desde los resúmenes empiezan en la primera cubeta completa.
+    """
+
+    NIVELES = {
+        'minuto': pd.Timedelta(minutes=1),
+        'hora': pd.Timedelta(hours=1),
+    }
+
+    def __init__(self,
+                 ventana_crudos=VENTANA_CRUDOS,
+                 max_crudos=MAX_EVENTOS_CRUDOS,
+                 retencion_minutos=RETENCION_MINUTOS,
+                 retencion_horas=RETENCION_HORAS,
+                 max_cubetas_minuto=MAX_CUBETAS_MINUTO,
+                 max_cubetas_hora=MAX_CUBETAS_HORA,
+                 margen_llegada=MARGEN_LLEGADA_S3,
+                 max_claves=MAX_CLAVES_VISTAS):
+        self.ventana_crudos = pd.Timedelta(ventana_crudos)
+        self.max_crudos = max_crudos
+        self.retencion = {
+            'minuto': pd.Timedelta(retencion_minutos),
+            'hora': pd.Timedelta(retencion_horas),
+        }
+        self.max_cubetas = {
+            'minuto': max_cubetas_minuto,
+            'hora': max_cubetas_hora,
+        }
+        self.margen_llegada = pd.Timedelta(margen_llegada)
+        self.max_claves = max_claves
+        self._lock = threading.Lock()
+        self._crudos = pd.DataFrame()
+        self._resumenes = {nivel: pd.DataFrame() for nivel in self.NIVELES}
+        self._mas_reciente = None
+        # Las filas crudas con timestamp posterior a esta marca están completas;
+        # las anteriores pudieron descartarse por el límite max_crudos.
+        self._crudos_completos_desde = None
+        # Claves S3 reclamadas dentro del margen de llegada (LastModified de cada
+        # una); las claves <= _clave_inicio ya no se listan.
+        self._claves_vistas = {}
+        self._clave_inicio = None
+        self._marca_s3 = None
+
+    # --- Ingesta ---
+
+    def clave_inicio(self):
+        """Clave S3 a partir de la cual listar (StartAfter); None al inicio."""
+        with self._lock:
+            return self._clave_inicio
+
+    def reclamar_nuevos(self, objetos):
+        """
+        Devuelve los objetos S3 que aún no se han procesado y los marca como
+        reclamados en la misma operación, así dos actualizaciones concurrentes
+        nunca descargan ni cuentan el mismo objeto.
+        """
+        with self._lock:
+            self._asentar_claves()
+            for obj in objetos:
+                if self._marca_s3 is None or obj["LastModified"] > self._marca_s3:
+                    self._marca_s3 = obj["LastModified"]
+            limite = self._marca_s3 - self.retencion['hora'] if self._marca_s3 is not None else None
+
+            nuevos = []
+            for obj in objetos:
+                if (obj["Key"] in self._claves_vistas or obj["LastModified"] < limite
+                        or (self._clave_inicio is not None and obj["Key"] <= self._clave_inicio)):
+                    continue
+                self._claves_vistas[obj["Key"]] = obj["LastModified"]
+                nuevos.append(obj)
+            return nuevos
+
+    def _asentar_claves(self):
+        """
+        Olvida las claves que llegaron antes del margen (o las más antiguas si se
+        excede max_claves) y mueve _clave_inicio después de ellas.
+        """
+        if self._marca_s3 is None:
+            return
+        limite = self._marca_s3 - self.margen_llegada
+        por_llegada = sorted(self._claves_vistas.items(), key=lambda item: item[1])
+        exceso = max(0, len(por_llegada) - self.max_claves)
+        asentadas = [
+            key for i, (key, modificado) in enumerate(por_llegada)
+            if i < exceso or modificado < limite
+        ]
+        if not asentadas:
+            return
+
+        self._clave_inicio = max([self._clave_inicio or '', *asentadas])
+        self._claves_vistas = {
+            key: modificado for key, modificado in self._claves_vistas.items()
+            if key > self._clave_inicio
+        }
+
+    def liberar(self, objetos):
+        """Devuelve objetos reclamados cuya descarga falló para reintentarlos después."""
+        with self._lock:
+            for obj in objetos:
+                self._claves_vistas.pop(obj["Key"], None)
+
+    def agregar(self, df_nuevos: pd.DataFrame):
+        """Incorpora eventos nuevos (con 'timestamp' ya convertido a datetime)."""
+        if df_nuevos.empty:
+            return
+
+        with self._lock:
+            nuevo_max = df_nuevos['timestamp'].max()
+            if self._mas_reciente is None or nuevo_max > self._mas_reciente:
+                self._mas_reciente = nuevo_max
+
+            # 1. Eventos crudos: solo la ventana reciente y como máximo max_crudos filas
+            crudos = df_nuevos if self._crudos.empty else pd.concat([self._crudos, df_nuevos], ignore_index=True)
+            crudos = crudos[crudos['timestamp'] >= self._mas_reciente - self.ventana_crudos]
+            crudos = crudos.sort_values('timestamp', kind='stable')
+            if len(crudos) > self.max_crudos:
+                crudos = crudos.tail(self.max_crudos)
+                self._crudos_completos_desde = crudos['timestamp'].iloc[0]
+            self._crudos = crudos.reset_index(drop=True)
+
+            # 2. Resúmenes por minuto y por hora
+            for nivel, tamano in self.NIVELES.items():
+                conteo = (
+                    df_nuevos
+                    .assign(cubeta=df_nuevos['timestamp'].dt.floor(tamano))
+                    .groupby(['cubeta', 'server_id'])['status']
+                    .value_counts()
+                    .unstack(fill_value=0)
+                )
+                if not self._resumenes[nivel].empty:
+                    conteo = pd.concat([self._resumenes[nivel], conteo])
+                resumen = conteo.fillna(0).astype('int64').groupby(level=['cubeta', 'server_id']).sum()
+                self._resumenes[nivel] = self._recortar(resumen, nivel)
+
+    def _recortar(self, resumen: pd.DataFrame, nivel: str):
+        """Elimina las cubetas fuera de la retención o que excedan el límite de memoria."""
+        cubetas = resumen.index.get_level_values('cubeta')
+        resumen = resumen[cubetas >= self._mas_reciente - self.retencion[nivel]]
+
+        cubetas_unicas = resumen.index.get_level_values('cubeta').unique().sort_values()
+        if len(cubetas_unicas) > self.max_cubetas[nivel]:
+            corte = cubetas_unicas[-self.max_cubetas[nivel]]
+            resumen = resumen[resumen.index.get_level_values('cubeta') >= corte]
+        return resumen
+
+    # --- Consultas ---
+
+    def crudos(self):
+        """Eventos crudos de la ventana reciente."""
+        with self._lock:
+            return self._crudos.copy()
+
+    def _nivel_para(self, rango):
+        """Elige el nivel más fino que cubre el rango solicitado."""
+        rango = pd.Timedelta(rango)
+        if rango <= self.retencion['minuto']:
+            return 'minuto'
+        return 'hora'
+
+    def conteo_por_servidor(self, rango):
+        """
+        Conteo de estados por servidor para el rango indicado (hasta el evento más
+        reciente). Devuelve el mismo formato que `generar_metricas_estado`.
+        """
+        with self._lock:
+            if self._mas_reciente is None:
+                return pd.DataFrame(columns=STATUS_COLUMNS)
+
+            rango = pd.Timedelta(rango)
+            desde_crudos = self._mas_reciente - rango
+            # Los crudos solo sirven si no se recortaron filas dentro del rango;
+            # si no, se responde con el resumen por minuto.
+            crudos_completos = (
+                self._crudos_completos_desde is None or desde_crudos > self._crudos_completos_desde
+            )
+            if rango <= self.ventana_crudos and crudos_completos:
+                crudos = self._crudos[self._crudos['timestamp'] >= desde_crudos]
+                if crudos.empty:
+                    return pd.DataFrame(columns=STATUS_COLUMNS)
+                return generar_metricas_estado(crudos)
+
+            nivel = self._nivel_para(rango)
+            resumen = self._resumenes[nivel]
+            # Solo cubetas completas dentro del rango
+            desde = (self._mas_reciente - rango).ceil(self.NIVELES[nivel])
+            resumen = resumen[resumen.index.get_level_values('cubeta') >= desde]
+
+        result_df = resumen.groupby(level='server_id').sum()
+        for col in STATUS_COLUMNS:
+            if col not in result_df.columns:
+                result_df[col] = 0
+        result_df = result_df[STATUS_COLUMNS]
+        result_df.index.name = 'server_id'
+        return result_df
+
+    def serie_temporal(self, rango):
+        """Conteo de estados (todos los servidores) por minuto u hora dentro del rango."""
+        with self._lock:
+            if self._mas_reciente is None:
+                return pd.DataFrame(columns=STATUS_COLUMNS)
+
+            nivel = self._nivel_para(rango)
+            resumen = self._resumenes[nivel]
+            desde = (self._mas_reciente - pd.Timedelta(rango)).ceil(self.NIVELES[nivel])
+            resumen = resumen[resumen.index.get_level_values('cubeta') >= desde]
+
+        serie = resumen.groupby(level='cubeta').sum()
+        for col in STATUS_COLUMNS:
+            if col not in serie.columns:
+                serie[col] = 0
+        return serie[STATUS_COLUMNS]
+
+
+# st.cache_resource comparte un único almacén entre sesiones y re-ejecuciones
+@st.cache_resource
+def get_almacen():
+    return AlmacenRetencion()
+
+almacen = get_almacen()
+
 # --- Funciones de Carga y Procesamiento de Datos ---
 
+def listar_objetos(bucket, prefix, desde=None):
+    """
+    Lista los objetos del prefijo con clave posterior a `desde` (todos si es
+    None), siguiendo la paginación de S3.
+    """
+    objetos = []
+    kwargs = {'Bucket': bucket, 'Prefix': prefix}
+    if desde is not None:
+        kwargs['StartAfter'] = desde
+    while True:
+        response = s3.list_objects_v2(**kwargs)
+        objetos.extend(response.get('Contents', []))
+        if not response.get('IsTruncated'):
+            return objetos
+        kwargs['ContinuationToken'] = response['NextContinuationToken']
+
 @st.cache_data(ttl=60) # Se refrescará automáticamente cada 60 segundos
 def actualizar_datos_desde_s3(timestamp):
     """
-    Carga todos los archivos JSON del prefijo S3, los concatena y los procesa.
+    Descarga solo los archivos JSON nuevos del prefijo S3, los incorpora al
+    almacén con retención y devuelve los eventos crudos de la ventana reciente.
     El argumento `timestamp` se usa para forzar la actualización del caché.
     """
     try:
-        # 1. Listar objetos
-        response = s3.list_objects_v2(Bucket=BUCKET_NAME, Prefix=PREFIX)
+        # 1. Listar solo los objetos posteriores a las claves ya asentadas
+        objetos = listar_objetos(BUCKET_NAME, PREFIX, almacen.clave_inicio())
         
         # Si no hay contenido, retorna un DataFrame vacío
-        if 'Contents' not in response:
+        if not objetos and almacen.clave_inicio() is None:
             st.warning("No se encontraron archivos en la ruta especificada.")
             return pd.DataFrame()
         
         data_frames = []
+        # Los objetos quedan reclamados por esta actualización; otra sesión que
+        # actualice al mismo tiempo no los vuelve a descargar.
+        nuevos = almacen.reclamar_nuevos(
+            [obj for obj in objetos if obj["Key"].endswith(".json")]
+        )
         
-        # 2. Descargar y procesar cada JSON
-        for obj in response["Contents"]:
-            key = obj["Key"]
-            if key.endswith(".json"):
-                file_obj = s3.get_object(Bucket=BUCKET_NAME, Key=key)
+        try:
+            # 2. Descargar y procesar cada JSON nuevo
+            for obj in nuevos:
+                file_obj = s3.get_object(Bucket=BUCKET_NAME, Key=obj["Key"])
                 content = file_obj["Body"].read().decode("utf-8")
                 json_data = json.loads(content)
                 # Normalizar el JSON a DataFrame
                 df_temp = pd.json_normalize(json_data)
                 data_frames.append(df_temp)
 
-        # 3. Concatenar DataFrames
-        if data_frames:
-            df = pd.concat(data_frames, ignore_index=True)
-            
-            # 4. Procesamiento: convertir 'timestamp' a datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            return df
-        else:
-            return pd.DataFrame()
+            # 3. Concatenar DataFrames e incorporarlos al almacén
+            if data_frames:
+                df = pd.concat(data_frames, ignore_index=True)
+                
+                # 4. Procesamiento: convertir 'timestamp' a datetime
+                df['timestamp'] = pd.to_datetime(df['timestamp'])
+                
+                almacen.agregar(df)
+        except Exception:
+            almacen.liberar(nuevos)
+            raise
+
+        return almacen.crudos()
             
     except Exception as e:
         st.error(f"Error al cargar o procesar los datos de S3: {e}")
@@ -79,87 +353,106 @@ def generar_metricas_estado(df_base: pd.DataFrame):
     
     # Asegurarse de que las columnas 'OK', 'WARN', 'ERROR' existan, aunque estén en 0
     # Esto es opcional, pero ayuda a la consistencia del dashboard
-    status_columns = ['OK', 'WARN', 'ERROR']
-    for col in status_columns:
+    for col in STATUS_COLUMNS:
         if col not in result_df.columns:
             result_df[col] = 0
             
-    result_df = result_df[status_columns]
+    result_df = result_df[STATUS_COLUMNS]
     result_df.index.name = 'server_id'
     
     return result_df
 
 # --- Layout del Dashboard Streamlit ---
 
-st.set_page_config(
-    page_title="Dashboard de Métricas de Servidores",
-    layout="wide",
-)
+# Rango de tiempo: los rangos largos se leen de los resúmenes por minuto/hora
+RANGOS = {
+    "Últimos 15 minutos": timedelta(minutes=15),
+    "Últimas 24 horas": timedelta(hours=24),
+    "Últimos 7 días": timedelta(days=7),
+}
 
-st.title("Monitoreo en Tiempo Real de Servidores 📊")
+def main():
+    st.set_page_config(
+        page_title="Dashboard de Métricas de Servidores",
+        layout="wide",
+    )
 
-# Sección para el botón de actualización y el temporizador
-col1, col2 = st.columns([1, 4])
+    st.title("Monitoreo en Tiempo Real de Servidores 📊")
 
-# Botón de actualización: forzar un nuevo timestamp para romper el caché
-if col1.button('Actualizar Datos'):
-    st.session_state['last_update'] = datetime.now()
-    st.toast('¡Datos actualizados!', icon='✅')
+    # Sección para el botón de actualización y el temporizador
+    col1, col2 = st.columns([1, 4])
 
-# Usar st.empty() para un placeholder de texto que se actualizará con st.info
-info_placeholder = col2.empty()
+    # Botón de actualización: forzar un nuevo timestamp para romper el caché
+    if col1.button('Actualizar Datos'):
+        st.session_state['last_update'] = datetime.now()
+        st.toast('¡Datos actualizados!', icon='✅')
 
-# Inicializar 'last_update' en el Session State si no existe
-if 'last_update' not in st.session_state:
-    st.session_state['last_update'] = datetime.now()
+    # Usar st.empty() para un placeholder de texto que se actualizará con st.info
+    info_placeholder = col2.empty()
 
-# Forzar la recarga de datos pasando el timestamp del botón como argumento
-df_actualizado = actualizar_datos_desde_s3(st.session_state['last_update'])
+    # Inicializar 'last_update' en el Session State si no existe
+    if 'last_update' not in st.session_state:
+        st.session_state['last_update'] = datetime.now()
 
-# Mostrar la hora de la última actualización
-info_placeholder.info(f"Última actualización de datos: {st.session_state['last_update'].strftime('%Y-%m-%d %H:%M:%S')}")
+    # Forzar la recarga de datos pasando el timestamp del botón como argumento
+    df_actualizado = actualizar_datos_desde_s3(st.session_state['last_update'])
 
+    # Mostrar la hora de la última actualización
+    info_placeholder.info(f"Última actualización de datos: {st.session_state['last_update'].strftime('%Y-%m-%d %H:%M:%S')}")
 
-# --- Visualización de Métricas ---
 
-if not df_actualizado.empty:
-    
-    # Generar el DataFrame de métricas de estado
-    metricas_df = generar_metricas_estado(df_actualizado)
-    
-    st.header("Conteo de Estados por Servidor")
-    
-    # Usar columnas de Streamlit para un layout de tipo "card"
-    # Mostrar las métricas totales
-    total_ok = metricas_df['OK'].sum()
-    total_warn = metricas_df['WARN'].sum()
-    total_error = metricas_df['ERROR'].sum()
+    # --- Visualización de Métricas ---
 
-    col_ok, col_warn, col_error = st.columns(3)
-    
-    col_ok.metric("Total OK", total_ok)
-    col_warn.metric("Total WARN", total_warn)
-    col_error.metric("Total ERROR", total_error)
-    
-    st.divider()
+    rango_seleccionado = st.radio("Rango de tiempo:", list(RANGOS), horizontal=True)
+    rango = RANGOS[rango_seleccionado]
 
-    # Mostrar la tabla de conteo de estados por servidor
-    st.subheader("Detalle por `server_id`")
-    st.dataframe(metricas_df)
-    
-    # Opcional: Mostrar un gráfico de barras
-    st.subheader("Gráfico de Conteo de Estados")
-    st.bar_chart(metricas_df)
-    
-    st.divider()
-    
-    # Opcional: Mostrar los datos crudos
-    st.subheader("Vista Previa de Datos Crudos")
-    st.dataframe(df_actualizado.tail(10)) 
+    if not df_actualizado.empty:
+
+        # Generar el DataFrame de métricas de estado del rango seleccionado
+        metricas_df = almacen.conteo_por_servidor(rango)
+
+        st.header("Conteo de Estados por Servidor")
+
+        # Usar columnas de Streamlit para un layout de tipo "card"
+        # Mostrar las métricas totales
+        total_ok = metricas_df['OK'].sum()
+        total_warn = metricas_df['WARN'].sum()
+        total_error = metricas_df['ERROR'].sum()
+
+        col_ok, col_warn, col_error = st.columns(3)
+
+        col_ok.metric("Total OK", total_ok)
+        col_warn.metric("Total WARN", total_warn)
+        col_error.metric("Total ERROR", total_error)
+
+        st.divider()
+
+        # Mostrar la tabla de conteo de estados por servidor
+        st.subheader("Detalle por `server_id`")
+        st.dataframe(metricas_df)
+
+        # Opcional: Mostrar un gráfico de barras
+        st.subheader("Gráfico de Conteo de Estados")
+        st.bar_chart(metricas_df)
+
+        # Serie temporal a partir de los resúmenes (por minuto o por hora)
+        st.subheader("Evolución de Estados en el Tiempo")
+        st.line_chart(almacen.serie_temporal(rango))
+
+        st.divider()
+
+        # Opcional: Mostrar los datos crudos
+        st.subheader("Vista Previa de Datos Crudos")
+        st.dataframe(df_actualizado.tail(10)) 
+
+    else:
+        st.warning("El DataFrame de métricas está vacío. Verifica la conexión a S3 y el contenido del bucket.")
 
-else:
-    st.warning("El DataFrame de métricas está vacío. Verifica la conexión a S3 y el contenido del bucket.")
+    time.sleep(10) # Esperar 10 segundos
+    st.rerun() # Forzar la re-ejecución
 
-time.sleep(10) # Esperar 10 segundos
-st.rerun() # Forzar la re-ejecución
 
+# Streamlit ejecuta el script como __main__; al importarlo (p. ej. desde el
+# benchmark) solo se cargan las funciones, sin dibujar el dashboard.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Benchmark de extremo a extremo para el dashboard de monitoreo (app_raw.py).
+
+Para cada tasa de eventos, el generador escribe JSON en un S3 local mientras
+se ejecuta el mismo ciclo de actualización que el dashboard
+(`actualizar_datos_desde_s3` + las consultas al almacén de cada rango de
+tiempo). Por cada actualización se registra:
+- latencia evento -> pantalla (desde el timestamp del evento hasta que aparece)
+- duración de la actualización y de las consultas de cada rango
+  (`conteo_por_servidor` + `serie_temporal`)
+- solicitudes a S3
+- memoria del proceso
+
+Uso:
+    python benchmark_app_raw.py --tasas 100,1000,5000 --duracion 30 --intervalo 2 --csv resultados.csv
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app_raw
+from generador_eventos import S3Local, ejecutar_generador
+
+
+def memoria_mb():
+    """Memoria residente actual del proceso (o el pico si /proc no está disponible)."""
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        # ru_maxrss está en KB en Linux y en bytes en macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+
+def etiqueta_rango(rango):
+    """Nombre corto de un rango para las columnas de resultados (15min, 24h, 7d)."""
+    segundos = int(rango.total_seconds())
+    if segundos < 3600:
+        return f"{segundos // 60}min"
+    if segundos <= 24 * 3600:
+        return f"{segundos // 3600}h"
+    return f"{segundos // (24 * 3600)}d"
+
+
+def consultar_rangos(almacen):
+    """
+    Ejecuta las consultas que dibuja el dashboard para cada rango de RANGOS.
+    Devuelve los ms de cada rango y el número de servidores del más corto.
+    """
+    tiempos = {}
+    servidores = None
+    for rango in app_raw.RANGOS.values():
+        t0 = time.perf_counter()
+        metricas = almacen.conteo_por_servidor(rango)
+        almacen.serie_temporal(rango)
+        tiempos[f"consulta_{etiqueta_rango(rango)}_ms"] = (time.perf_counter() - t0) * 1000
+        if servidores is None:
+            servidores = len(metricas)
+    return tiempos, servidores
+
+
+def ejecutar_etapa(directorio, eventos_por_segundo, servidores, duracion, intervalo, eventos_por_archivo):
+    """Ejecuta el generador y el ciclo de actualización para una tasa de eventos."""
+    s3 = S3Local(directorio)
+    app_raw.s3 = s3
+    app_raw.almacen = app_raw.AlmacenRetencion()
+
+    detener = threading.Event()
+    generador = threading.Thread(
+        target=ejecutar_generador,
+        kwargs=dict(
+            s3=s3,
+            eventos_por_segundo=eventos_por_segundo,
+            servidores=servidores,
+            duracion=duracion,
+            eventos_por_archivo=eventos_por_archivo,
+            detener=detener,
+        ),
+        daemon=True,
+    )
+    generador.start()
+
+    filas = []
+    ultimo_visto = None
+    inicio = time.perf_counter()
+    while generador.is_alive():
+        time.sleep(intervalo)
+
+        solicitudes_antes = s3.total_solicitudes()
+        t0 = time.perf_counter()
+        # Limpia el caché para que cada llamada haga una actualización real
+        app_raw.actualizar_datos_desde_s3.clear()
+        df = app_raw.actualizar_datos_desde_s3(datetime.now())
+        t1 = time.perf_counter()
+        consultas, servidores_vistos = consultar_rangos(app_raw.almacen)
+        mostrado = pd.Timestamp.now()
+
+        # Latencia de los eventos que aparecen por primera vez en esta actualización
+        latencias = pd.Series(dtype='float64')
+        if not df.empty:
+            nuevos = df if ultimo_visto is None else df[df['timestamp'] > ultimo_visto]
+            latencias = (mostrado - nuevos['timestamp']).dt.total_seconds()
+            ultimo_visto = df['timestamp'].max()
+
+        filas.append({
+            'eventos_por_segundo': eventos_por_segundo,
+            'segundo': round(time.perf_counter() - inicio, 1),
+            'eventos_en_ventana': len(df),
+            'servidores': servidores_vistos,
+            'nuevos_mostrados': len(latencias),
+            'latencia_p50_s': latencias.median(),
+            'latencia_p95_s': latencias.quantile(0.95),
+            'actualizacion_ms': (t1 - t0) * 1000,
+            **consultas,
+            'solicitudes_s3': s3.total_solicitudes() - solicitudes_antes,
+            'memoria_mb': memoria_mb(),
+        })
+
+    detener.set()
+    generador.join()
+    return filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia y carga para app_raw.py")
+    parser.add_argument('--tasas', default='100,1000,5000',
+                        help="Eventos por segundo de cada etapa, separados por comas")
+    parser.add_argument('--servidores', type=int, default=50)
+    parser.add_argument('--duracion', type=float, default=30, help="Segundos por etapa")
+    parser.add_argument('--intervalo', type=float, default=2, help="Segundos entre actualizaciones")
+    parser.add_argument('--eventos-por-archivo', type=int, default=100)
+    parser.add_argument('--csv', help="Ruta opcional para guardar los resultados detallados")
+    args = parser.parse_args()
+
+    filas = []
+    for tasa in [int(t) for t in args.tasas.split(',')]:
+        with tempfile.TemporaryDirectory(prefix='s3_local_') as directorio:
+            print(f"Etapa: {tasa:,} eventos/s durante {args.duracion:.0f} s ...")
+            filas.extend(ejecutar_etapa(
+                directorio, tasa, args.servidores, args.duracion,
+                args.intervalo, args.eventos_por_archivo,
+            ))
+
+    resultados = pd.DataFrame(filas)
+    if args.csv:
+        resultados.to_csv(args.csv, index=False)
+
+    resumen = resultados.groupby('eventos_por_segundo').agg(
+        actualizaciones=('segundo', 'count'),
+        eventos_en_ventana=('eventos_en_ventana', 'max'),
+        latencia_p50_s=('latencia_p50_s', 'median'),
+        latencia_p95_s=('latencia_p95_s', 'max'),
+        actualizacion_ms=('actualizacion_ms', 'mean'),
+        actualizacion_max_ms=('actualizacion_ms', 'max'),
+        **{
+            columna: (columna, 'mean')
+            for columna in resultados.columns if columna.startswith('consulta_')
+        },
+        solicitudes_s3=('solicitudes_s3', 'sum'),
+        memoria_mb=('memoria_mb', 'max'),
+    )
+    print()
+    print("=" * 80)
+    print("RESUMEN DEL BENCHMARK - app_raw.py")
+    print("=" * 80)
+    print(resumen.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Configuración S3 compartida por app_raw.py y el generador de eventos."""
+
+BUCKET_NAME = "xideralaws-curso-benjamin2"
+PREFIX = "raw/"
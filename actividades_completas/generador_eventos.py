@@ -0,0 +1,187 @@
+"""
+Generador de carga para el dashboard de monitoreo (app_raw.py).
+
+Escribe eventos sintéticos {server_id, status, timestamp} en archivos JSON a
+una tasa configurable, dentro de un "S3 local": un directorio que imita las
+llamadas de boto3 que usa el dashboard (list_objects_v2, get_object y
+put_object) y que lleva la cuenta de las solicitudes realizadas.
+
+Uso:
+    python generador_eventos.py --directorio ./s3_local --eventos-por-segundo 200 --duracion 60
+"""
+import argparse
+import io
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+from config_s3 import BUCKET_NAME, PREFIX
+
+ESTADOS = ['OK', 'WARN', 'ERROR']
+PESOS_ESTADOS = [0.90, 0.07, 0.03]
+
+
+# --- S3 Local ---
+
+class S3Local:
+    """
+    Sustituto local de un cliente S3: cada bucket es una carpeta dentro de
+    `directorio` y cada clave un archivo. Solo implementa lo que usa app_raw.py.
+    """
+
+    def __init__(self, directorio, max_keys=1000):
+        self.directorio = directorio
+        self.max_keys = max_keys
+        self.solicitudes = {'list_objects_v2': 0, 'get_object': 0, 'put_object': 0}
+        self._lock = threading.Lock()
+
+    def _contar(self, operacion):
+        with self._lock:
+            self.solicitudes[operacion] += 1
+
+    def total_solicitudes(self):
+        with self._lock:
+            return sum(self.solicitudes.values())
+
+    def _ruta(self, bucket, key):
+        return os.path.join(self.directorio, bucket, *key.split('/'))
+
+    def put_object(self, Bucket, Key, Body):
+        self._contar('put_object')
+        ruta = self._ruta(Bucket, Key)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        # Escritura atómica para que un lector nunca vea un JSON a medias
+        temporal = ruta + '.tmp'
+        with open(temporal, 'wb') as f:
+            f.write(Body)
+        os.replace(temporal, ruta)
+        return {}
+
+    def get_object(self, Bucket, Key):
+        self._contar('get_object')
+        with open(self._ruta(Bucket, Key), 'rb') as f:
+            return {'Body': io.BytesIO(f.read())}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, StartAfter=None, **kwargs):
+        self._contar('list_objects_v2')
+        raiz = os.path.join(self.directorio, Bucket)
+        claves = []
+        for carpeta, _, archivos in os.walk(raiz):
+            for nombre in archivos:
+                if nombre.endswith('.tmp'):
+                    continue
+                ruta = os.path.join(carpeta, nombre)
+                key = os.path.relpath(ruta, raiz).replace(os.sep, '/')
+                if key.startswith(Prefix):
+                    claves.append((key, ruta))
+        claves.sort()
+
+        # Paginación como en S3: el token es la última clave devuelta
+        if ContinuationToken:
+            claves = [c for c in claves if c[0] > ContinuationToken]
+        elif StartAfter:
+            claves = [c for c in claves if c[0] > StartAfter]
+        pagina = claves[:self.max_keys]
+
+        contents = []
+        for key, ruta in pagina:
+            stat = os.stat(ruta)
+            contents.append({
+                'Key': key,
+                'LastModified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                'Size': stat.st_size,
+            })
+
+        response = {'IsTruncated': len(claves) > self.max_keys, 'KeyCount': len(contents)}
+        if contents:
+            response['Contents'] = contents
+        if response['IsTruncated']:
+            response['NextContinuationToken'] = pagina[-1][0]
+        return response
+
+
+# --- Generación de Eventos ---
+
+def generar_eventos(n, servidores):
+    """Crea `n` eventos sintéticos con la hora actual como timestamp."""
+    ahora = datetime.now().isoformat()
+    return [
+        {
+            'server_id': f"server-{random.randrange(servidores):03d}",
+            'status': random.choices(ESTADOS, weights=PESOS_ESTADOS)[0],
+            'timestamp': ahora,
+        }
+        for _ in range(n)
+    ]
+
+
+def ejecutar_generador(s3, eventos_por_segundo, servidores=10, duracion=60,
+                       eventos_por_archivo=100, bucket=BUCKET_NAME, prefix=PREFIX,
+                       detener=None):
+    """
+    Escribe `eventos_por_segundo` eventos por segundo durante `duracion` segundos,
+    agrupados en archivos JSON de hasta `eventos_por_archivo` eventos.
+    Devuelve el total de eventos escritos.
+    """
+    detener = detener or threading.Event()
+    archivos_por_segundo = max(1, -(-eventos_por_segundo // eventos_por_archivo))
+    intervalo = 1 / archivos_por_segundo
+    por_archivo = eventos_por_segundo / archivos_por_segundo
+
+    inicio = time.perf_counter()
+    total = 0
+    acumulado = 0.0
+    secuencia = 0
+    tick = 0
+    while not detener.is_set():
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= duracion:
+            break
+
+        # Reparte el resto fraccionario para respetar la tasa promedio
+        acumulado += por_archivo
+        n = int(acumulado)
+        acumulado -= n
+        if n:
+            key = f"{prefix}{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}-{secuencia:08d}.json"
+            s3.put_object(Bucket=bucket, Key=key, Body=json.dumps(generar_eventos(n, servidores)))
+            total += n
+            secuencia += 1
+
+        # Programa el siguiente archivo respecto al inicio para no acumular retraso
+        tick += 1
+        detener.wait(max(0.0, inicio + tick * intervalo - time.perf_counter()))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de eventos sintéticos para app_raw.py")
+    parser.add_argument('--directorio', default='s3_local', help="Carpeta que hace de S3 local")
+    parser.add_argument('--bucket', default=BUCKET_NAME)
+    parser.add_argument('--prefix', default=PREFIX)
+    parser.add_argument('--eventos-por-segundo', type=int, default=100)
+    parser.add_argument('--servidores', type=int, default=10)
+    parser.add_argument('--duracion', type=float, default=60, help="Segundos de generación")
+    parser.add_argument('--eventos-por-archivo', type=int, default=100)
+    args = parser.parse_args()
+
+    s3 = S3Local(args.directorio)
+    total = ejecutar_generador(
+        s3,
+        eventos_por_segundo=args.eventos_por_segundo,
+        servidores=args.servidores,
+        duracion=args.duracion,
+        eventos_por_archivo=args.eventos_por_archivo,
+        bucket=args.bucket,
+        prefix=args.prefix,
+    )
+    print(f"Eventos escritos: {total:,} en s3://{args.bucket}/{args.prefix} ({args.directorio})")
+
+
+if __name__ == "__main__":
+    main()
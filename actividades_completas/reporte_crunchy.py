@@ -0,0 +1,119 @@
+"""
+Reporte headless de los KPIs de anime (app_crunchy.py), sin notebook ni widgets.
+
+Calcula todos los KPIs para una grilla de parámetros, guarda las tablas como
+JSON y CSV y genera las gráficas en paralelo en procesos separados (backend
+Agg). El reporte termina en el tiempo de la gráfica más lenta.
+
+Uso:
+    python reporte_crunchy.py --salida reporte --top-n 5,10,15,20 --procesos 4
+"""
+import os
+
+# Backend sin ventana; los procesos hijos heredan la variable de entorno
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app_crunchy
+
+CRITERIOS = ['rating', 'members']
+
+
+def guardar_tabla(tabla, salida, nombre):
+    """Guarda un DataFrame como CSV y JSON y devuelve las rutas relativas."""
+    tabla = tabla.reset_index()
+    tabla.to_csv(os.path.join(salida, f"{nombre}.csv"), index=False)
+    tabla.to_json(os.path.join(salida, f"{nombre}.json"), orient='records', force_ascii=False, indent=2)
+    return [f"{nombre}.csv", f"{nombre}.json"]
+
+
+def renderizar_grafica(nombre_figura, parametros, ruta):
+    """Se ejecuta en un proceso hijo: construye la figura y la guarda como imagen."""
+    import matplotlib.pyplot as plt
+
+    fig = getattr(app_crunchy, nombre_figura)(**parametros)
+    fig.savefig(ruta, dpi=100, bbox_inches='tight')
+    plt.close(fig)
+    return os.path.basename(ruta)
+
+
+def generar_reporte(salida, valores_top_n, procesos=None, formato='png'):
+    """Genera el paquete de reporte en `salida` y devuelve el manifiesto."""
+    os.makedirs(salida, exist_ok=True)
+    inicio = time.perf_counter()
+
+    # 1. Gráficas: se lanzan primero para que corran mientras se guardan las tablas
+    graficas = [('rating', 'figura_rating', {}), ('tipo_programa', 'figura_tipo_programa', {})]
+    graficas += [
+        (f"generos_top{n}", 'figura_generos_populares', {'top_n': n})
+        for n in valores_top_n
+    ]
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futuros = [
+            executor.submit(renderizar_grafica, figura, parametros, os.path.join(salida, f"{nombre}.{formato}"))
+            for nombre, figura, parametros in graficas
+        ]
+
+        # 2. Tablas (memoizadas en app_crunchy)
+        tablas = []
+        # .item() convierte los escalares de numpy sin volver flotantes los conteos
+        rating = {
+            k: v.item() if hasattr(v, 'item') else v
+            for k, v in app_crunchy.calcular_rating().items()
+        }
+        with open(os.path.join(salida, 'rating.json'), 'w', encoding='utf-8') as f:
+            json.dump(rating, f, indent=2)
+        tablas.append('rating.json')
+
+        tablas += guardar_tabla(app_crunchy.calcular_tipo_programa(), salida, 'tipo_programa')
+        for n in valores_top_n:
+            tablas += guardar_tabla(app_crunchy.calcular_generos_populares(n), salida, f"generos_top{n}")
+            for criterio in CRITERIOS:
+                tablas += guardar_tabla(
+                    app_crunchy.calcular_top_animes(criterio, n), salida, f"top_animes_{criterio}_top{n}"
+                )
+
+        imagenes = [futuro.result() for futuro in futuros]
+
+    manifiesto = {
+        'generado': datetime.now().isoformat(timespec='seconds'),
+        'fuente': app_crunchy.ARCHIVO_ANIME,
+        'parametros': {'top_n': valores_top_n, 'criterio': CRITERIOS},
+        'tablas': tablas,
+        'graficas': imagenes,
+        'duracion_s': round(time.perf_counter() - inicio, 3),
+    }
+    with open(os.path.join(salida, 'reporte.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+    return manifiesto
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte headless de KPIs de anime")
+    parser.add_argument('--salida', default='reporte_crunchy', help="Carpeta del paquete de reporte")
+    parser.add_argument('--top-n', default='5,10,15,20', help="Valores de Top N separados por comas")
+    parser.add_argument('--procesos', type=int, default=None, help="Procesos para las gráficas (por defecto, uno por CPU)")
+    parser.add_argument('--formato', default='png', help="Formato de imagen (png, svg, pdf)")
+    args = parser.parse_args()
+
+    manifiesto = generar_reporte(
+        args.salida,
+        [int(n) for n in args.top_n.split(',')],
+        procesos=args.procesos,
+        formato=args.formato,
+    )
+    print(f"Reporte generado en {args.salida}/ "
+          f"({len(manifiesto['tablas'])} tablas, {len(manifiesto['graficas'])} gráficas, "
+          f"{manifiesto['duracion_s']:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,8 @@ import math
 import numpy as np
 import pandas as pd
 import streamlit as st
-import seaborn as sns
-import matplotlib.pyplot as plt
 from typing import Optional
+from datos_juegos import DatasetIncremental
 
 # --- Configuración de la Página de Streamlit ---
 st.set_page_config(
@@ -19,28 +18,57 @@ st.set_page_config(
 # Paleta de colores de Seaborn
 COLOR_PALETTE = 'rocket'
 
-# Configuración inicial de estilo
-sns.set_theme(style="darkgrid", palette=COLOR_PALETTE)
+# Seaborn/Matplotlib se importan al dibujar la primera gráfica y no al arrancar,
+# así los KPIs se muestran antes y el proceso inicia más rápido.
+@st.cache_resource
+def load_plotting():
+    """Importa la librería de gráficas y aplica la configuración inicial de estilo."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set_theme(style="darkgrid", palette=COLOR_PALETTE)
+    return sns, plt
 
 # --- 1. Carga de Datos y Preprocesamiento ---
-@st.cache_data
+DATA_FILE = "online_gaming_insights.csv"
+
+# st.cache_resource (y no cache_data) para no copiar el DataFrame por sesión:
+# el dataset vive en un archivo Arrow compartido entre procesos (ver datos_juegos.py).
+@st.cache_resource
 def load_data(file_path):
-    """Carga los datos y realiza el preprocesamiento necesario."""
-    try:
-        df = pd.read_csv(file_path)
-        # Asegurar que Gender y GameGenre sean categóricas
-        df['Gender'] = df['Gender'].astype('category')
-        df['GameGenre'] = df['GameGenre'].astype('category')
-        return df
-    except FileNotFoundError:
-        st.error(f"Error: No se encontró el archivo {file_path}. Asegúrate de que esté en el mismo directorio.")
-        return pd.DataFrame()
+    """Dataset tipado que se mantiene al día cuando se agregan filas al CSV."""
+    return DatasetIncremental(file_path)
 
-df = load_data("online_gaming_insights.csv")
+# En cada re-ejecución solo se revisa el tamaño del archivo: si crecieron filas
+# al final se parsea únicamente la cola. Junto al DataFrame se obtienen las
+# estadísticas base del dataset completo (KPIs, medias, rangos, cuantiles,
+# histogramas y orden de categorías), compartidas entre sesiones.
+try:
+    df, baseline = load_data(DATA_FILE).actualizar()
+except FileNotFoundError:
+    st.error(f"Error: No se encontró el archivo {DATA_FILE}. Asegúrate de que esté en el mismo directorio.")
+    st.stop()
 
 if df.empty:
     st.stop()
 
+# Las estadísticas base vienen del JSON: una columna sin valores tiene media
+# None y una media global puede ser 0, así que se formatean con cuidado.
+NO_DISPONIBLE = "n/d"
+
+def formatear(valor, formato):
+    """Formatea un número o devuelve "n/d" si falta."""
+    if valor is None or pd.isna(valor):
+        return NO_DISPONIBLE
+    return format(valor, formato)
+
+def variacion_porcentual(valor, referencia):
+    """Diferencia porcentual contra la referencia; None si no se puede calcular."""
+    if valor is None or referencia is None or pd.isna(valor) or pd.isna(referencia) or referencia == 0:
+        return None
+    return (valor - referencia) / referencia * 100
+
 # --- 2. Barra Lateral Interactiva y Filtros ---
 st.sidebar.title("🛠️ Opciones de Filtrado")
 
@@ -55,7 +83,8 @@ st.sidebar.markdown("---")
 # Variables de filtro
 gender_filter = None
 age_filter = None
-filtered_df = df.copy()
+# El DataFrame es compartido y de solo lectura: los filtros crean vistas nuevas
+filtered_df = df
 
 # Si está en modo filtrado, mostrar opciones
 if analysis_mode == "Análisis Filtrado":
@@ -70,23 +99,27 @@ if analysis_mode == "Análisis Filtrado":
     
     # Filtro por Rango de Edad
     st.sidebar.markdown("**Rango de Edad:**")
-    min_age_data, max_age_data = int(df['Age'].min()), int(df['Age'].max())
-    age_filter = st.sidebar.slider(
-        "Edad:",
-        min_value=min_age_data,
-        max_value=max_age_data,
-        value=(min_age_data, max_age_data),
-        step=1
-    )
+    min_age_data, max_age_data = baseline['minimos']['Age'], baseline['maximos']['Age']
+    if min_age_data is None or max_age_data is None:
+        st.sidebar.info(f"Edad: {NO_DISPONIBLE}")
+    else:
+        age_filter = st.sidebar.slider(
+            "Edad:",
+            min_value=int(min_age_data),
+            max_value=int(max_age_data),
+            value=(int(min_age_data), int(max_age_data)),
+            step=1
+        )
     
     # Aplicar filtros
     if gender_filter != 'Todos':
         filtered_df = filtered_df[filtered_df['Gender'] == gender_filter]
     
-    filtered_df = filtered_df[
-        (filtered_df['Age'] >= age_filter[0]) & 
-        (filtered_df['Age'] <= age_filter[1])
-    ]
+    if age_filter is not None:
+        filtered_df = filtered_df[
+            (filtered_df['Age'] >= age_filter[0]) & 
+            (filtered_df['Age'] <= age_filter[1])
+        ]
 
 # --- 3. Vista General ---
 if analysis_mode == "Vista General":
@@ -97,15 +130,15 @@ if analysis_mode == "Vista General":
     st.header("1. Indicadores Clave de Rendimiento (KPIs)")
     col1, col2, col3, col4 = st.columns(4)
 
-    total_players = len(df)
-    avg_play_time = df['PlayTimeHours'].mean()
-    conversion_rate = (df['InGamePurchases'] > 0).sum() / total_players * 100
-    avg_level = df['PlayerLevel'].mean()
+    total_players = baseline['total_players']
+    avg_play_time = baseline['avg_play_time']
+    conversion_rate = baseline['conversion_rate']
+    avg_level = baseline['avg_level']
 
     col1.metric("Total de Jugadores", f"{total_players:,}")
-    col2.metric("Promedio Horas de Juego", f"{avg_play_time:,.2f} hrs")
-    col3.metric("Tasa de Compra", f"{conversion_rate:,.2f}%")
-    col4.metric("Nivel Promedio de Jugador", f"{avg_level:,.0f}")
+    col2.metric("Promedio Horas de Juego", f"{formatear(avg_play_time, ',.2f')} hrs")
+    col3.metric("Tasa de Compra", f"{formatear(conversion_rate, ',.2f')}%")
+    col4.metric("Nivel Promedio de Jugador", formatear(avg_level, ',.0f'))
     
     st.markdown("---")
 
@@ -117,14 +150,27 @@ if analysis_mode == "Vista General":
     
     # --- Distribuciones Globales ---
     st.header("3. Distribuciones Globales")
-    
+    sns, plt = load_plotting()
+    
+    # Las gráficas globales se dibujan con los histogramas y frecuencias de las
+    # estadísticas base, sin recorrer el DataFrame completo en cada re-ejecución.
+    hist_age = baseline['histogramas']['Age']
+    hist_play = baseline['histogramas']['PlayTimeHours']
+    freq_genre = baseline['frecuencias']['GameGenre']
+    freq_gender = baseline['frecuencias']['Gender']
+
     # Fila 1: Edades y Género de Videojuego
     col_age, col_genre = st.columns(2)
 
     with col_age:
         st.subheader("Distribución de Jugadores por Edad")
         fig_age, ax_age = plt.subplots(figsize=(10, 6))
-        sns.histplot(df['Age'], kde=True, bins=20, ax=ax_age, color=sns.color_palette(COLOR_PALETTE)[0])
+        ax_age.stairs(
+            hist_age['conteos'], 
+            hist_age['bordes'], 
+            fill=True, 
+            color=sns.color_palette(COLOR_PALETTE)[0]
+        )
         ax_age.set_xlabel("Edad", fontsize=12)
         ax_age.set_ylabel("Frecuencia", fontsize=12)
         st.pyplot(fig_age)
@@ -132,10 +178,9 @@ if analysis_mode == "Vista General":
     with col_genre:
         st.subheader("Distribución por Género de Videojuego")
         fig_g, ax_g = plt.subplots(figsize=(10, 6))
-        sns.countplot(
-            data=df, 
-            y='GameGenre', 
-            order=df['GameGenre'].value_counts().index, 
+        sns.barplot(
+            x=list(freq_genre.values()), 
+            y=list(freq_genre), 
             palette=COLOR_PALETTE,
             ax=ax_g
         )
@@ -149,7 +194,14 @@ if analysis_mode == "Vista General":
     with col_density:
         st.subheader("Densidad de Curva de Horas de Juego")
         fig_den, ax_den = plt.subplots(figsize=(10, 6))
-        sns.kdeplot(df['PlayTimeHours'], fill=True, ax=ax_den, color=sns.color_palette(COLOR_PALETTE, as_cmap=True)(0.8))
+        # Densidad a partir del histograma: conteo / (total * ancho del bin)
+        bordes_play = np.asarray(hist_play['bordes'])
+        conteos_play = np.asarray(hist_play['conteos'])
+        densidad = conteos_play / (conteos_play.sum() * np.diff(bordes_play))
+        centros = (bordes_play[:-1] + bordes_play[1:]) / 2
+        color_den = sns.color_palette(COLOR_PALETTE, as_cmap=True)(0.8)
+        ax_den.plot(centros, densidad, color=color_den)
+        ax_den.fill_between(centros, densidad, alpha=0.25, color=color_den)
         ax_den.set_xlabel("Horas de Juego (PlayTimeHours)", fontsize=12)
         ax_den.set_ylabel("Densidad", fontsize=12)
         st.pyplot(fig_den)
@@ -157,10 +209,9 @@ if analysis_mode == "Vista General":
     with col_freq_gender:
         st.subheader("Frecuencias por Género")
         fig_fg, ax_fg = plt.subplots(figsize=(10, 6))
-        sns.countplot(
-            data=df, 
-            x='Gender', 
-            order=df['Gender'].value_counts().index, 
+        sns.barplot(
+            x=list(freq_gender), 
+            y=list(freq_gender.values()), 
             palette=COLOR_PALETTE,
             ax=ax_fg
         )
@@ -200,19 +251,19 @@ elif analysis_mode == "Análisis Filtrado":
     avg_level_filtered = filtered_df['PlayerLevel'].mean()
     
     # Calcular diferencias con la media general
-    delta_play = ((avg_play_filtered - df['PlayTimeHours'].mean()) / df['PlayTimeHours'].mean()) * 100
-    delta_conversion = conversion_filtered - ((df['InGamePurchases'] > 0).sum() / len(df) * 100)
-    delta_purchases = ((avg_purchases_filtered - df['InGamePurchases'].mean()) / df['InGamePurchases'].mean()) * 100
+    delta_play = variacion_porcentual(avg_play_filtered, baseline['avg_play_time'])
+    delta_conversion = conversion_filtered - baseline['conversion_rate']
+    delta_purchases = variacion_porcentual(avg_purchases_filtered, baseline['avg_purchases'])
     
     col1.metric(
         "Jugadores en Segmento", 
         f"{total_filtered:,}",
-        delta=f"{(total_filtered/len(df)*100):.1f}% del total"
+        delta=f"{(total_filtered/baseline['total_players']*100):.1f}% del total"
     )
     col2.metric(
         "Promedio Horas de Juego", 
-        f"{avg_play_filtered:.2f} hrs",
-        delta=f"{delta_play:+.1f}% vs general"
+        f"{formatear(avg_play_filtered, '.2f')} hrs",
+        delta=None if delta_play is None else f"{delta_play:+.1f}% vs general"
     )
     col3.metric(
         "Tasa de Conversión", 
@@ -221,8 +272,8 @@ elif analysis_mode == "Análisis Filtrado":
     )
     col4.metric(
         "Compras In-Game Promedio", 
-        f"{avg_purchases_filtered:.2f}",
-        delta=f"{delta_purchases:+.1f}% vs general"
+        formatear(avg_purchases_filtered, '.2f'),
+        delta=None if delta_purchases is None else f"{delta_purchases:+.1f}% vs general"
     )
     
     st.markdown("---")
@@ -260,6 +311,7 @@ elif analysis_mode == "Análisis Filtrado":
     
     # --- Visualizaciones del Segmento ---
     st.header("📈 Análisis Visual del Segmento")
+    sns, plt = load_plotting()
     
     # Gráfico 1: Distribución de Edades en el segmento
     st.subheader("1. Distribución de Edades en el Segmento")
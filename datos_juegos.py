@@ -0,0 +1,457 @@
+"""
+Carga compartida del dataset de juegos online para app.py.
+
+El CSV se parsea una sola vez por versión (fecha de modificación y tamaño) y
+se publica como archivo Arrow IPC en memoria compartida (/dev/shm cuando
+existe). Cada proceso de Streamlit lo abre con memory map, así todas las
+réplicas del mismo host comparten las mismas páginas en lugar de guardar su
+propia copia del DataFrame.
+"""
+import glob
+import io
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+# Carpeta donde se publica el dataset; se puede cambiar con DATASET_CACHE_DIR
+DIRECTORIO_COMPARTIDO = os.environ.get('DATASET_CACHE_DIR') or (
+    '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+)
+
+COLUMNAS_CATEGORICAS = ['Gender', 'GameGenre']
+
+# Formato del Arrow publicado; forma parte del nombre para no adjuntar
+# archivos que dejó una versión anterior del código
+FORMATO_ARROW = 2
+# Metadato del Arrow publicado con los bytes del CSV que cubre
+METADATO_PROCESADOS = b'bytes_procesados'
+
+
+def version_fuente(ruta):
+    """Identificador de la versión del CSV; None si el archivo no existe."""
+    try:
+        stat = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _tamano_version(version):
+    """Tamaño en bytes del CSV que corresponde a una versión."""
+    return int(version.rsplit('-', 1)[1])
+
+
+def _orden_version(version):
+    """Clave para ordenar versiones del CSV: (fecha de modificación, tamaño)."""
+    return tuple(int(parte) for parte in version.split('-'))
+
+
+def ruta_publicada(ruta, version):
+    """Ruta del archivo Arrow publicado para una versión del CSV."""
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    return os.path.join(DIRECTORIO_COMPARTIDO, f"{nombre}.{version}.f{FORMATO_ARROW}.arrow")
+
+
+def ruta_estadisticas(ruta, version):
+    """Ruta del JSON de estadísticas base publicado para una versión del CSV."""
+    return os.path.splitext(ruta_publicada(ruta, version))[0] + '.base.json'
+
+
+def leer_csv(ruta, hasta=None):
+    """
+    Lee el CSV (solo los primeros `hasta` bytes si se indica, para que el
+    contenido coincida con la versión) y aplica los tipos que usa el dashboard.
+    Solo se leen líneas completas: una última línea a medio escribir se deja
+    para la siguiente actualización. Devuelve (df, bytes leídos).
+    """
+    with open(ruta, 'rb') as f:
+        contenido = f.read(-1 if hasta is None else hasta)
+    contenido = contenido[:contenido.rfind(b'\n') + 1]
+    df = pd.read_csv(io.BytesIO(contenido))
+    # Asegurar que Gender y GameGenre sean categóricas
+    for columna in COLUMNAS_CATEGORICAS:
+        df[columna] = df[columna].astype('category')
+    return df, len(contenido)
+
+
+def _escribir_json(destino, datos):
+    """Escritura atómica de un JSON publicado."""
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    os.replace(temporal, destino)
+
+
+def publicar_dataset(ruta, version=None):
+    """
+    Parsea el CSV y lo publica como Arrow IPC si esa versión aún no existe.
+    Devuelve la ruta del archivo publicado.
+    """
+    version = version or version_fuente(ruta)
+    if version is None:
+        raise FileNotFoundError(ruta)
+
+    destino = ruta_publicada(ruta, version)
+    if os.path.exists(destino):
+        return destino
+    df, procesados = leer_csv(ruta, hasta=_tamano_version(version))
+    return publicar_tabla(df, ruta, version, procesados)
+
+
+def publicar_tabla(df, ruta, version, procesados):
+    """
+    Publica un DataFrame ya tipado como el Arrow IPC de una versión del CSV.
+    `procesados` son los bytes del CSV que cubre (hasta la última línea
+    completa) y se guardan en los metadatos del esquema.
+    """
+    destino = ruta_publicada(ruta, version)
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    tabla = tabla.replace_schema_metadata({
+        **tabla.schema.metadata, METADATO_PROCESADOS: str(procesados).encode(),
+    })
+    # Escritura atómica: otro proceso nunca ve un archivo a medias; si dos
+    # procesos publican a la vez, ambos escriben el mismo contenido.
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    with pa.OSFile(temporal, 'wb') as sink:
+        with pa.ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+    os.replace(temporal, destino)
+
+    _eliminar_versiones_anteriores(ruta, version)
+    return destino
+
+
+def _eliminar_versiones_anteriores(ruta, vigente):
+    """
+    Borra los archivos publicados (Arrow y estadísticas) de versiones del mismo
+    CSV anteriores a `vigente`. Solo se tocan nombres que publica este módulo
+    (el directorio puede ser el mismo del CSV) y nunca versiones más nuevas,
+    que pudo publicar otra réplica que va adelante.
+    """
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    sufijo = f".f{FORMATO_ARROW}"
+    for extension in ('arrow', 'base.json'):
+        patron = f"{glob.escape(nombre)}.*{sufijo}.{extension}"
+        for anterior in glob.glob(os.path.join(DIRECTORIO_COMPARTIDO, patron)):
+            version = os.path.basename(anterior)[len(nombre) + 1:].split(sufijo + '.', 1)[0]
+            try:
+                if _orden_version(version) >= _orden_version(vigente):
+                    continue
+            except ValueError:
+                continue
+            try:
+                # En Linux los procesos que aún lo tienen mapeado no se ven afectados
+                os.remove(anterior)
+            except OSError:
+                pass
+
+
+def abrir_dataset(ruta, version=None):
+    """
+    Devuelve el DataFrame respaldado por el archivo Arrow compartido de la
+    versión actual del CSV, publicándolo primero si hace falta.
+    """
+    return _abrir_version(ruta, version)[0]
+
+
+def _abrir_version(ruta, version=None):
+    """
+    Publica (si hace falta) y mapea una versión del CSV. Devuelve (df, bytes
+    del CSV que cubre). Si otra réplica borró el archivo entre publicarlo y
+    abrirlo, se vuelve a publicar.
+    """
+    version = version or version_fuente(ruta)
+    try:
+        return _mapear(publicar_dataset(ruta, version))
+    except FileNotFoundError:
+        return _mapear(publicar_dataset(ruta, version))
+
+
+def _mapear(destino):
+    """
+    Abre un archivo Arrow publicado con memory map y lo expone como DataFrame.
+    Devuelve (df, bytes del CSV que cubre).
+    """
+    tabla = pa.ipc.open_file(pa.memory_map(destino, 'r')).read_all()
+    procesados = int(tabla.schema.metadata[METADATO_PROCESADOS])
+    # split_blocks evita consolidar columnas en bloques nuevos: las columnas
+    # numéricas siguen apuntando a las páginas mapeadas del archivo.
+    return tabla.to_pandas(split_blocks=True), procesados
+
+
+# --- Estadísticas Base ---
+# Agregados globales del dataset completo, calculados una vez por versión del CSV.
+
+CUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+BINS_HISTOGRAMA = 20
+# Versión de las claves del JSON publicado; uno con otra versión se recalcula
+ESQUEMA_ESTADISTICAS = 2
+
+
+def _numero(valor):
+    """Convierte un escalar a float para el JSON; los valores faltantes quedan como None."""
+    return None if pd.isna(valor) else float(valor)
+
+
+def calcular_estadisticas_base(df):
+    """
+    KPIs globales, medias, rangos, cuantiles e histogramas de las columnas
+    numéricas y frecuencias (ordenadas de mayor a menor) de las categóricas.
+    Los valores faltantes se ignoran; una columna sin valores queda con None.
+    """
+    total_players = len(df)
+    numericas = [c for c in df.select_dtypes('number').columns if c != 'PlayerID']
+    categoricas = [c for c in df.columns if c not in numericas and c != 'PlayerID']
+
+    histogramas = {}
+    for columna in numericas:
+        conteos, bordes = np.histogram(df[columna].dropna(), bins=BINS_HISTOGRAMA)
+        histogramas[columna] = {'conteos': conteos.tolist(), 'bordes': bordes.tolist()}
+
+    cuantiles = df[numericas].quantile(CUANTILES)
+    return {
+        'esquema': ESQUEMA_ESTADISTICAS,
+        'total_players': total_players,
+        'compradores': int((df['InGamePurchases'] > 0).sum()),
+        'avg_play_time': _numero(df['PlayTimeHours'].mean()),
+        'conversion_rate': float((df['InGamePurchases'] > 0).sum() / total_players * 100) if total_players else 0.0,
+        'avg_purchases': _numero(df['InGamePurchases'].mean()),
+        'avg_level': _numero(df['PlayerLevel'].mean()),
+        # Valores no faltantes por columna (denominador de cada media)
+        'validos': {c: int(df[c].count()) for c in numericas},
+        'medias': {c: _numero(df[c].mean()) for c in numericas},
+        'minimos': {c: _numero(df[c].min()) for c in numericas},
+        'maximos': {c: _numero(df[c].max()) for c in numericas},
+        'cuantiles': {
+            c: {str(q): _numero(cuantiles.at[q, c]) for q in CUANTILES} for c in numericas
+        },
+        'histogramas': histogramas,
+        # Tras una actualización incremental se estiman desde los histogramas
+        'cuantiles_aproximados': False,
+        'frecuencias': {
+            c: {str(k): int(v) for k, v in df[c].value_counts().items()} for c in categoricas
+        },
+    }
+
+
+def leer_estadisticas_base(ruta, version=None):
+    """
+    Devuelve las estadísticas base de la versión actual del CSV. Se calculan una
+    vez y se publican como JSON junto al archivo Arrow, así cualquier proceso
+    las lee sin recorrer el dataset. Un JSON de otro esquema se recalcula.
+    """
+    version = version or version_fuente(ruta)
+    destino = ruta_estadisticas(ruta, version)
+    try:
+        with open(destino, encoding='utf-8') as f:
+            estadisticas = json.load(f)
+        if estadisticas.get('esquema') == ESQUEMA_ESTADISTICAS:
+            return estadisticas
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    estadisticas = calcular_estadisticas_base(abrir_dataset(ruta, version))
+    _escribir_json(destino, estadisticas)
+    return estadisticas
+
+
+def _cuantil_desde_histograma(conteos, bordes, q):
+    """Estima un cuantil interpolando linealmente dentro del histograma."""
+    acumulado = np.cumsum(conteos)
+    if not acumulado[-1]:
+        return None
+    objetivo = q * acumulado[-1]
+    i = min(int(np.searchsorted(acumulado, objetivo)), len(conteos) - 1)
+    previo = acumulado[i - 1] if i > 0 else 0
+    fraccion = (objetivo - previo) / conteos[i] if conteos[i] else 0.0
+    return float(bordes[i] + fraccion * (bordes[i + 1] - bordes[i]))
+
+
+def fusionar_estadisticas(base, nuevos):
+    """
+    Incorpora filas nuevas a unas estadísticas base con trabajo proporcional a
+    las filas nuevas. Medias, tasas, rangos y frecuencias quedan exactos; los
+    histogramas conservan sus bordes (los valores fuera de rango se suman a los
+    extremos) y los cuantiles se estiman a partir de ellos.
+    """
+    total = base['total_players'] + len(nuevos)
+    compradores = base['compradores'] + int((nuevos['InGamePurchases'] > 0).sum())
+
+    # Cada media se pondera por sus valores no faltantes, no por el total de filas
+    validos = {c: n + int(nuevos[c].count()) for c, n in base['validos'].items()}
+    medias = {
+        c: ((base['medias'][c] or 0.0) * base['validos'][c] + float(nuevos[c].sum())) / n
+        if n else None
+        for c, n in validos.items()
+    }
+
+    def extremo(funcion, anterior, nuevo):
+        valores = [v for v in (anterior, _numero(nuevo)) if v is not None]
+        return funcion(valores) if valores else None
+
+    histogramas = {}
+    for columna, hist in base['histogramas'].items():
+        bordes = np.asarray(hist['bordes'])
+        valores = np.clip(nuevos[columna].dropna().to_numpy(dtype='float64'), bordes[0], bordes[-1])
+        conteos = np.asarray(hist['conteos']) + np.histogram(valores, bins=bordes)[0]
+        histogramas[columna] = {'conteos': conteos.tolist(), 'bordes': hist['bordes']}
+
+    frecuencias = {}
+    for columna, conteo in base['frecuencias'].items():
+        combinadas = pd.Series(conteo, dtype='int64').add(
+            nuevos[columna].dropna().astype(str).value_counts(), fill_value=0
+        ).astype('int64')
+        # Mismo orden que value_counts: de mayor a menor frecuencia
+        combinadas = combinadas.sort_values(ascending=False, kind='stable')
+        frecuencias[columna] = {str(k): int(v) for k, v in combinadas.items()}
+
+    return {
+        'esquema': ESQUEMA_ESTADISTICAS,
+        'total_players': total,
+        'compradores': compradores,
+        'avg_play_time': medias['PlayTimeHours'],
+        'conversion_rate': compradores / total * 100 if total else 0.0,
+        'avg_purchases': medias['InGamePurchases'],
+        'avg_level': medias['PlayerLevel'],
+        'validos': validos,
+        'medias': medias,
+        'minimos': {c: extremo(min, v, nuevos[c].min()) for c, v in base['minimos'].items()},
+        'maximos': {c: extremo(max, v, nuevos[c].max()) for c, v in base['maximos'].items()},
+        'cuantiles': {
+            c: {
+                str(q): _cuantil_desde_histograma(h['conteos'], h['bordes'], q)
+                for q in CUANTILES
+            }
+            for c, h in histogramas.items()
+        },
+        'histogramas': histogramas,
+        'cuantiles_aproximados': True,
+        'frecuencias': frecuencias,
+    }
+
+
+# --- Actualización Incremental ---
+
+class DatasetIncremental:
+    """
+    Dataset tipado y sus estadísticas base, al día con las filas que se agregan
+    al final del CSV. En cada `actualizar()` se compara el tamaño del archivo
+    con los bytes ya procesados:
+    - sin cambios: no se hace nada
+    - bytes agregados tras el mismo contenido: se parsea solo la cola y se
+      fusiona con el DataFrame y con las estadísticas base
+    - cualquier otro cambio (archivo reescrito o truncado): recarga completa
+    """
+
+    # Bytes finales ya procesados que se comparan para detectar reescrituras
+    BYTES_FIRMA = 256
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.df = None
+        self.estadisticas = None
+        self.version = None
+        self._offset = 0
+        self._firma = b''
+        self._lock = threading.Lock()
+
+    def actualizar(self):
+        """Devuelve (df, estadisticas) al día con el CSV."""
+        with self._lock:
+            version = version_fuente(self.ruta)
+            if version is None:
+                raise FileNotFoundError(self.ruta)
+
+            if version != self.version:
+                tamano = _tamano_version(version)
+                if self.df is None or not self._es_agregado(tamano):
+                    self._recargar(version)
+                elif tamano > self._offset:
+                    self._agregar_cola(version, tamano)
+                self.version = version
+            return self.df, self.estadisticas
+
+    def _leer_bytes(self, inicio, fin):
+        with open(self.ruta, 'rb') as f:
+            f.seek(inicio)
+            return f.read(fin - inicio)
+
+    def _es_agregado(self, tamano):
+        """True si el archivo solo creció: lo ya procesado sigue intacto y terminaba en salto de línea."""
+        if tamano < self._offset or not self._firma.endswith(b'\n'):
+            return False
+        return self._leer_bytes(self._offset - len(self._firma), self._offset) == self._firma
+
+    def _recargar(self, version):
+        # El offset es el fin de la última línea completa, no el tamaño del archivo
+        self.df, self._offset = _abrir_version(self.ruta, version)
+        self.estadisticas = leer_estadisticas_base(self.ruta, version)
+        self._firma = self._leer_bytes(max(0, self._offset - self.BYTES_FIRMA), self._offset)
+
+    def _agregar_cola(self, version, tamano):
+        """
+        Parsea y fusiona solo la cola, pero unir las filas al DataFrame y
+        republicar el Arrow sigue copiando las n filas: el dashboard filtra un
+        único DataFrame contiguo en cada render, que ya recorre las n filas, y
+        el archivo publicado evita que las demás réplicas parseen el CSV. Si
+        otro proceso ya publicó esta versión, se adjunta sin copiar nada.
+        """
+        if os.path.exists(ruta_publicada(self.ruta, version)):
+            self._recargar(version)
+            return
+
+        cola = self._leer_bytes(self._offset, tamano)
+        # Solo líneas completas; una última línea a medio escribir espera a la próxima vez
+        fin = cola.rfind(b'\n')
+        if fin < 0:
+            return
+        cola = cola[:fin + 1]
+
+        try:
+            nuevos = self._parsear(cola)
+        except (ValueError, pd.errors.ParserError):
+            self._recargar(version)
+            return
+
+        if not nuevos.empty:
+            self.df = self._concatenar(nuevos)
+            self.estadisticas = fusionar_estadisticas(self.estadisticas, nuevos)
+        self._offset += len(cola)
+        self._firma = (self._firma + cola)[-self.BYTES_FIRMA:]
+
+        # Se publica esta versión para que los demás procesos la adjunten sin
+        # parsear, y se vuelve a la copia compartida. El contenido coincide con
+        # una carga completa: las líneas completas de los primeros `tamano` bytes.
+        destino = ruta_publicada(self.ruta, version)
+        if not os.path.exists(destino):
+            publicar_tabla(self.df, self.ruta, version, self._offset)
+            _escribir_json(ruta_estadisticas(self.ruta, version), self.estadisticas)
+        try:
+            self.df, self._offset = _mapear(destino)
+        except FileNotFoundError:
+            # Otra réplica publicó una versión más nueva y borró esta
+            publicar_tabla(self.df, self.ruta, version, self._offset)
+            self.df, self._offset = _mapear(destino)
+
+    def _parsear(self, cola):
+        """Parsea las líneas nuevas con las mismas columnas y tipos del DataFrame actual."""
+        tipos = {
+            c: self.df[c].dtype for c in self.df.columns if c not in COLUMNAS_CATEGORICAS
+        }
+        return pd.read_csv(io.BytesIO(cola), header=None, names=list(self.df.columns), dtype=tipos)
+
+    def _concatenar(self, nuevos):
+        """Une las filas nuevas al DataFrame, ampliando las categorías si aparecen valores nuevos."""
+        base = self.df
+        tipos = {}
+        for columna in COLUMNAS_CATEGORICAS:
+            categorias = base[columna].cat.categories.union(pd.Index(nuevos[columna].dropna().unique()))
+            tipos[columna] = pd.CategoricalDtype(categorias)
+        if any(len(t.categories) != len(base[c].cat.categories) for c, t in tipos.items()):
+            base = base.astype(tipos)
+        return pd.concat([base, nuevos.astype(tipos)], ignore_index=True)
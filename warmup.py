@@ -0,0 +1,35 @@
+"""
+Precalentamiento del contenedor antes de abrir el puerto de Streamlit.
+
+Publica el dataset tipado en memoria compartida y calcula las estadísticas
+base (KPIs globales, cuantiles, histogramas), así la primera solicitud de cada
+réplica solo adjunta los archivos ya listos en lugar de parsear el CSV.
+
+Uso:
+    python warmup.py [ruta_csv]
+"""
+import sys
+import time
+
+from datos_juegos import leer_estadisticas_base, publicar_dataset, version_fuente
+
+DATA_FILE = "online_gaming_insights.csv"
+
+
+def main():
+    ruta = sys.argv[1] if len(sys.argv) > 1 else DATA_FILE
+    inicio = time.perf_counter()
+
+    version = version_fuente(ruta)
+    if version is None:
+        print(f"warmup: no se encontró {ruta}, se omite el precalentamiento")
+        return
+
+    destino = publicar_dataset(ruta, version)
+    estadisticas = leer_estadisticas_base(ruta, version)
+    print(f"warmup: {estadisticas['total_players']:,} jugadores publicados en {destino} "
+          f"({time.perf_counter() - inicio:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()